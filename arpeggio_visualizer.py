@@ -22,60 +22,300 @@ python arpeggio_visualizer.py protein.pdb -s /A/10/ /B/25/ /C/30/ --auto-pymol
 
 import json
 import argparse
+import asyncio
 import os
+import re
 import sys
 import subprocess
 import tempfile
 import shutil
 import time
+from collections import Counter, namedtuple
+from functools import lru_cache
 
-def run_arpeggio_analysis(structure_file, selection, output_dir="out"):
-    """Run pdbe-arpeggio analysis"""
-    print(f"Running arpeggio analysis for selection {selection}...")
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import pymol2
+except ImportError:
+    pymol2 = None
+
+if msgspec is not None:
+    # Typed views over the arpeggio JSON: msgspec only materializes these
+    # fields and skips every other key while parsing
+    class ArpeggioAtom(msgspec.Struct):
+        auth_asym_id: str = 'A'
+        auth_seq_id: int = 1
+        auth_atom_id: str = 'CA'
+
+    # bgn/end stay as raw JSON slices until the contact is known to be
+    # atom-atom, so plane/group entries are never decoded
+    class ArpeggioContact(msgspec.Struct):
+        type: str = ''
+        bgn: msgspec.Raw = msgspec.Raw(b'{}')
+        end: msgspec.Raw = msgspec.Raw(b'{}')
+        contact: list = []
+        distance: float = 0.0
+
+    contacts_decoder = msgspec.json.Decoder(list[ArpeggioContact])
+    # strict=False coerces residue numbers written as strings ("10") to int
+    atom_decoder = msgspec.json.Decoder(ArpeggioAtom, strict=False)
+
+# Selection formats, tried in order: /A/10/, any other /.../ (unparseable),
+# A:10, and a bare residue number
+SELECTION_RE = re.compile(
+    r'/+([^/]+)/([^/]*)(?:/.*)?/+'
+    r'|/(?:.*/)?'
+    r'|([^:]*):([^:]*)'
+    r'|(.*)',
+    re.DOTALL
+)
+
+# One interaction between two atoms, as drawn in the PyMOL script
+Contact = namedtuple('Contact', [
+    'bgn_sel', 'end_sel', 'bgn_residue', 'end_residue',
+    'interaction_type', 'dist_flag', 'original_type', 'distance'
+])
+
+# Arpeggio contact types -> PyMOL interaction labels
+CONTACT_TYPE_MAPPING = {
+    'clash': 'clash', 'covalent': 'covalent', 'vdw_clash': 'vdwclash',
+    'vdw': 'vdw', 'proximal': 'proximal', 'hbond': 'hbond',
+    'weak_hbond': 'weakhbond', 'xbond': 'xbond', 'ionic': 'ionic',
+    'metal': 'metalcomplex', 'aromatic': 'aromatic', 'hydrophobic': 'hydrophobic',
+    'carbonyl': 'carbonyl', 'polar': 'polar', 'weak_polar': 'weakpolar'
+}
+
+# Contact types that describe the distance class of a contact
+DIST_FLAG_MAPPING = {
+    'clash': 'clash', 'covalent': 'covalent', 'vdw_clash': 'vdwclash',
+    'vdw': 'vdw', 'proximal': 'proximal'
+}
+
+# Enhanced PyMOL configuration with better colors and styling
+PYMOL_CONFIG = {
+    "dashcolor": {
+        "hbond": {"vdwclash": "purple", "vdw": "purple", "proximal": "purple"},
+        "polar": {"vdwclash": "lightblue", "vdw": "lightblue", "proximal": "lightblue"},
+        "weakhbond": {"vdwclash": "violet", "vdw": "violet", "proximal": "violet"},
+        "weakpolar": {"vdwclash": "paleblue", "vdw": "paleblue", "proximal": "paleblue"},
+        "aromatic": {"vdwclash": "red", "vdw": "red", "proximal": "red"},
+        "hydrophobic": {"vdwclash": "blue", "vdw": "blue", "proximal": "blue"},
+        "carbonyl": {"vdwclash": "orange", "vdw": "orange", "proximal": "orange"},
+        "ionic": {"vdwclash": "yellow", "vdw": "yellow", "proximal": "yellow"},
+        "metalcomplex": {"covalent": "magenta", "vdwclash": "magenta", "vdw": "magenta"},
+        "xbond": {"vdwclash": "cyan", "vdw": "cyan", "proximal": "cyan"},
+        "undefined": {"covalent": "white", "vdwclash": "lightcoral", "vdw": "green", "proximal": "grey60"},
+        "clash": {"clash": "lightcoral"},
+        "covalent": {"covalent": "white"},
+        "vdwclash": {"vdwclash": "lightcoral"},
+        "vdw": {"vdw": "green"},
+        "proximal": {"proximal": "grey60"}
+    },
+    "dashradius": {
+        "hbond": {"vdwclash": 0.03, "vdw": 0.03, "proximal": 0.03},
+        "polar": {"vdwclash": 0.025, "vdw": 0.025, "proximal": 0.025},
+        "weakhbond": {"vdwclash": 0.02, "vdw": 0.02, "proximal": 0.02},
+        "weakpolar": {"vdwclash": 0.02, "vdw": 0.02, "proximal": 0.02},
+        "aromatic": {"vdwclash": 0.035, "vdw": 0.035, "proximal": 0.035},
+        "hydrophobic": {"vdwclash": 0.025, "vdw": 0.025, "proximal": 0.025},
+        "carbonyl": {"vdwclash": 0.025, "vdw": 0.025, "proximal": 0.025},
+        "ionic": {"vdwclash": 0.04, "vdw": 0.04, "proximal": 0.04},
+        "metalcomplex": {"covalent": 0.04, "vdwclash": 0.04, "vdw": 0.04},
+        "xbond": {"vdwclash": 0.025, "vdw": 0.025, "proximal": 0.025},
+        "undefined": {"covalent": 0.02, "vdwclash": 0.02, "vdw": 0.02, "proximal": 0.015},
+        "clash": {"clash": 0.02},
+        "covalent": {"covalent": 0.02},
+        "vdwclash": {"vdwclash": 0.02},
+        "vdw": {"vdw": 0.02},
+        "proximal": {"proximal": 0.015}
+    },
+    "dashgap": {
+        "hbond": {"vdwclash": 0.15, "vdw": 0.15, "proximal": 0.15},
+        "polar": {"vdwclash": 0.2, "vdw": 0.2, "proximal": 0.2},
+        "weakhbond": {"vdwclash": 0.25, "vdw": 0.25, "proximal": 0.25},
+        "weakpolar": {"vdwclash": 0.25, "vdw": 0.25, "proximal": 0.25},
+        "aromatic": {"vdwclash": 0.1, "vdw": 0.1, "proximal": 0.1},
+        "hydrophobic": {"vdwclash": 0.2, "vdw": 0.2, "proximal": 0.2},
+        "carbonyl": {"vdwclash": 0.2, "vdw": 0.2, "proximal": 0.2},
+        "ionic": {"vdwclash": 0.1, "vdw": 0.1, "proximal": 0.1},
+        "metalcomplex": {"covalent": 0.1, "vdwclash": 0.1, "vdw": 0.1},
+        "xbond": {"vdwclash": 0.2, "vdw": 0.2, "proximal": 0.2},
+        "undefined": {"covalent": 0.0, "vdwclash": 0.3, "vdw": 0.3, "proximal": 0.8},
+        "clash": {"clash": 0.3},
+        "covalent": {"covalent": 0.0},
+        "vdwclash": {"vdwclash": 0.3},
+        "vdw": {"vdw": 0.3},
+        "proximal": {"proximal": 0.8}
+    },
+    "dashlength": {
+        "hbond": {"vdwclash": 0.2, "vdw": 0.2, "proximal": 0.2},
+        "polar": {"vdwclash": 0.15, "vdw": 0.15, "proximal": 0.15},
+        "weakhbond": {"vdwclash": 0.1, "vdw": 0.1, "proximal": 0.1},
+        "weakpolar": {"vdwclash": 0.1, "vdw": 0.1, "proximal": 0.1},
+        "aromatic": {"vdwclash": 0.25, "vdw": 0.25, "proximal": 0.25},
+        "hydrophobic": {"vdwclash": 0.15, "vdw": 0.15, "proximal": 0.15},
+        "carbonyl": {"vdwclash": 0.15, "vdw": 0.15, "proximal": 0.15},
+        "ionic": {"vdwclash": 0.3, "vdw": 0.3, "proximal": 0.3},
+        "metalcomplex": {"covalent": 0.3, "vdwclash": 0.3, "vdw": 0.3},
+        "xbond": {"vdwclash": 0.15, "vdw": 0.15, "proximal": 0.15},
+        "undefined": {"covalent": 0.5, "vdwclash": 0.1, "vdw": 0.1, "proximal": 0.05},
+        "clash": {"clash": 0.1},
+        "covalent": {"covalent": 0.5},
+        "vdwclash": {"vdwclash": 0.1},
+        "vdw": {"vdw": 0.1},
+        "proximal": {"proximal": 0.05}
+    }
+}
+
+# (interaction type, distance flag) -> (color, radius, gap, length)
+INTERACTION_STYLING = {
+    (interaction_type, flag): (
+        color,
+        PYMOL_CONFIG['dashradius'][interaction_type][flag],
+        PYMOL_CONFIG['dashgap'][interaction_type][flag],
+        PYMOL_CONFIG['dashlength'][interaction_type][flag]
+    )
+    for interaction_type, colors in PYMOL_CONFIG['dashcolor'].items()
+    for flag, color in colors.items()
+}
+
+# Static start of every generated PyMOL script
+PYMOL_SCRIPT_HEADER = """\
+# Enhanced Arpeggio Visualization Script
+# Generated for selection: {selection_str}
+reinitialize
+
+# Enhanced visual settings
+set valence, 1
+set stick_rad, 0.12
+set line_width, 2
+set mesh_width, 0.5
+set label_size, 12
+set sphere_scale, 0.2
+set dash_round_ends, 1
+set dash_gap, 0.2
+set dash_length, 0.15
+
+# Enhanced color palette
+set_color lightblue, (173, 216, 230)
+set_color lightcoral, (240, 128, 128)
+set_color paleblue, (175, 238, 238)
+set_color violet, (238, 130, 238)
+set_color gold, (255, 215, 0)
+set_color forest, (34, 139, 34)
+set_color crimson, (220, 20, 60)
+
+# Premium quality settings
+set line_smooth, 1
+set antialias, 3
+set cartoon_fancy_helices, 1
+set cartoon_smooth_loops, 1
+set depth_cue, 1
+set specular, 1
+set shininess, 50
+set surface_quality, 2
+set stick_quality, 20
+set sphere_quality, 3
+set cartoon_sampling, 20
+set ribbon_sampling, 15
+set transparency_mode, 2
+set stick_ball, 1
+set stick_ball_ratio, 2.0
+set ray_shadows, 1
+rebuild
+
+load {structure_file}
+select binding_site, None
+select target_residue, None
+set defer_update, 1
+
+"""
+
+# PyMOL command emitted once per distinct (label, atom pair) contact
+DISTANCE_COMMAND = "distance {label}, ({bgn}), ({end})\n"
+
+async def run_subprocess(cmd, timeout=None):
+    """Run cmd without blocking the event loop, returning (returncode, stdout, stderr)"""
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return proc.returncode, stdout.decode(errors='replace'), stderr.decode(errors='replace')
+
+async def run_arpeggio_analysis(structure_file, selections=None, output_dir="out"):
+    """Run pdbe-arpeggio analysis once for all selections (or the whole structure)"""
+    if selections:
+        print(f"Running arpeggio analysis for selection(s) {' '.join(selections)}...")
+    else:
+        print("Running arpeggio analysis for the whole structure...")
     
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
     # Build arpeggio command
-    cmd = [
-        "pdbe-arpeggio",
-        "-s", selection,
-        "-o", output_dir,
-        structure_file
-    ]
+    cmd = ["pdbe-arpeggio"]
+    if selections:
+        cmd += ["-s", *selections]
+    cmd += ["-o", output_dir, structure_file]
     
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        print("Arpeggio analysis completed successfully!")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"Error running arpeggio: {e}")
-        print(f"stdout: {e.stdout}")
-        print(f"stderr: {e.stderr}")
-        return False
+        returncode, stdout, stderr = await run_subprocess(cmd)
     except FileNotFoundError:
         print("Error: pdbe-arpeggio not found. Make sure it's installed and in your PATH.")
         return False
+    
+    if returncode != 0:
+        print(f"Error running arpeggio: {' '.join(cmd)} returned non-zero exit status {returncode}")
+        print(f"stdout: {stdout}")
+        print(f"stderr: {stderr}")
+        return False
+    
+    print("Arpeggio analysis completed successfully!")
+    return True
 
 def parse_selection(selection_str):
     """Parse selection string like /A/10/ or A:10 into components"""
-    if selection_str.startswith('/') and selection_str.endswith('/'):
+    match = SELECTION_RE.fullmatch(selection_str)
+    if match is None:
+        return None, None
+    
+    slash_chain, slash_resid, colon_chain, colon_resid, bare_resid = match.groups()
+    if slash_chain is not None:
         # Format: /A/10/
-        parts = selection_str.strip('/').split('/')
-        if len(parts) >= 2:
-            chain = parts[0] if parts[0] else 'A'
-            resid = parts[1] if parts[1] else None
-            return chain, resid
-    elif ':' in selection_str:
+        return slash_chain, slash_resid or None
+    if colon_chain is not None:
         # Format: A:10
-        chain, resid = selection_str.split(':')
-        return chain, resid
-    else:
+        return colon_chain, colon_resid
+    if bare_resid is not None:
         # Assume it's just a residue number
-        return None, selection_str
+        return None, bare_resid
     
+    # /.../ without both chain and residue
     return None, None
 
+def residue_selection(residues_by_chain):
+    """Build one PyMOL selection expression from {chain: resids}"""
+    clauses = []
+    for chain, resids in residues_by_chain.items():
+        # Negative residue numbers must be escaped inside a + separated resi list
+        resi_list = '+'.join(str(resid).replace('-', '\\-') for resid in resids)
+        clauses.append(f"(chain {chain} and resi {resi_list})")
+    return ' or '.join(clauses)
+
 def generate_enhanced_pymol_script(json_file, structure_file, selection_str, output_script):
     """Generate enhanced PyMOL script with better visualization"""
     
@@ -83,382 +323,309 @@ def generate_enhanced_pymol_script(json_file, structure_file, selection_str, out
     chain, resid = parse_selection(selection_str)
     filter_selection = f"{chain}:{resid}" if chain and resid else resid
     
-    # Enhanced PyMOL configuration with better colors and styling
-    pymol_config = {
-        "dashcolor": {
-            "hbond": {"vdwclash": "purple", "vdw": "purple", "proximal": "purple"},
-            "polar": {"vdwclash": "lightblue", "vdw": "lightblue", "proximal": "lightblue"},
-            "weakhbond": {"vdwclash": "violet", "vdw": "violet", "proximal": "violet"},
-            "weakpolar": {"vdwclash": "paleblue", "vdw": "paleblue", "proximal": "paleblue"},
-            "aromatic": {"vdwclash": "red", "vdw": "red", "proximal": "red"},
-            "hydrophobic": {"vdwclash": "blue", "vdw": "blue", "proximal": "blue"},
-            "carbonyl": {"vdwclash": "orange", "vdw": "orange", "proximal": "orange"},
-            "ionic": {"vdwclash": "yellow", "vdw": "yellow", "proximal": "yellow"},
-            "metalcomplex": {"covalent": "magenta", "vdwclash": "magenta", "vdw": "magenta"},
-            "xbond": {"vdwclash": "cyan", "vdw": "cyan", "proximal": "cyan"},
-            "undefined": {"covalent": "white", "vdwclash": "lightcoral", "vdw": "green", "proximal": "grey60"},
-            "clash": {"clash": "lightcoral"},
-            "covalent": {"covalent": "white"},
-            "vdwclash": {"vdwclash": "lightcoral"},
-            "vdw": {"vdw": "green"},
-            "proximal": {"proximal": "grey60"}
-        },
-        "dashradius": {
-            "hbond": {"vdwclash": 0.03, "vdw": 0.03, "proximal": 0.03},
-            "polar": {"vdwclash": 0.025, "vdw": 0.025, "proximal": 0.025},
-            "weakhbond": {"vdwclash": 0.02, "vdw": 0.02, "proximal": 0.02},
-            "weakpolar": {"vdwclash": 0.02, "vdw": 0.02, "proximal": 0.02},
-            "aromatic": {"vdwclash": 0.035, "vdw": 0.035, "proximal": 0.035},
-            "hydrophobic": {"vdwclash": 0.025, "vdw": 0.025, "proximal": 0.025},
-            "carbonyl": {"vdwclash": 0.025, "vdw": 0.025, "proximal": 0.025},
-            "ionic": {"vdwclash": 0.04, "vdw": 0.04, "proximal": 0.04},
-            "metalcomplex": {"covalent": 0.04, "vdwclash": 0.04, "vdw": 0.04},
-            "xbond": {"vdwclash": 0.025, "vdw": 0.025, "proximal": 0.025},
-            "undefined": {"covalent": 0.02, "vdwclash": 0.02, "vdw": 0.02, "proximal": 0.015},
-            "clash": {"clash": 0.02},
-            "covalent": {"covalent": 0.02},
-            "vdwclash": {"vdwclash": 0.02},
-            "vdw": {"vdw": 0.02},
-            "proximal": {"proximal": 0.015}
-        },
-        "dashgap": {
-            "hbond": {"vdwclash": 0.15, "vdw": 0.15, "proximal": 0.15},
-            "polar": {"vdwclash": 0.2, "vdw": 0.2, "proximal": 0.2},
-            "weakhbond": {"vdwclash": 0.25, "vdw": 0.25, "proximal": 0.25},
-            "weakpolar": {"vdwclash": 0.25, "vdw": 0.25, "proximal": 0.25},
-            "aromatic": {"vdwclash": 0.1, "vdw": 0.1, "proximal": 0.1},
-            "hydrophobic": {"vdwclash": 0.2, "vdw": 0.2, "proximal": 0.2},
-            "carbonyl": {"vdwclash": 0.2, "vdw": 0.2, "proximal": 0.2},
-            "ionic": {"vdwclash": 0.1, "vdw": 0.1, "proximal": 0.1},
-            "metalcomplex": {"covalent": 0.1, "vdwclash": 0.1, "vdw": 0.1},
-            "xbond": {"vdwclash": 0.2, "vdw": 0.2, "proximal": 0.2},
-            "undefined": {"covalent": 0.0, "vdwclash": 0.3, "vdw": 0.3, "proximal": 0.8},
-            "clash": {"clash": 0.3},
-            "covalent": {"covalent": 0.0},
-            "vdwclash": {"vdwclash": 0.3},
-            "vdw": {"vdw": 0.3},
-            "proximal": {"proximal": 0.8}
-        },
-        "dashlength": {
-            "hbond": {"vdwclash": 0.2, "vdw": 0.2, "proximal": 0.2},
-            "polar": {"vdwclash": 0.15, "vdw": 0.15, "proximal": 0.15},
-            "weakhbond": {"vdwclash": 0.1, "vdw": 0.1, "proximal": 0.1},
-            "weakpolar": {"vdwclash": 0.1, "vdw": 0.1, "proximal": 0.1},
-            "aromatic": {"vdwclash": 0.25, "vdw": 0.25, "proximal": 0.25},
-            "hydrophobic": {"vdwclash": 0.15, "vdw": 0.15, "proximal": 0.15},
-            "carbonyl": {"vdwclash": 0.15, "vdw": 0.15, "proximal": 0.15},
-            "ionic": {"vdwclash": 0.3, "vdw": 0.3, "proximal": 0.3},
-            "metalcomplex": {"covalent": 0.3, "vdwclash": 0.3, "vdw": 0.3},
-            "xbond": {"vdwclash": 0.15, "vdw": 0.15, "proximal": 0.15},
-            "undefined": {"covalent": 0.5, "vdwclash": 0.1, "vdw": 0.1, "proximal": 0.05},
-            "clash": {"clash": 0.1},
-            "covalent": {"covalent": 0.5},
-            "vdwclash": {"vdwclash": 0.1},
-            "vdw": {"vdw": 0.1},
-            "proximal": {"proximal": 0.05}
-        }
-    }
-    
-    script_lines = []
-    
-    def add_command(cmd):
-        script_lines.append(cmd)
-    
-    # Enhanced PyMOL setup
-    add_command('# Enhanced Arpeggio Visualization Script')
-    add_command(f'# Generated for selection: {selection_str}')
-    add_command('reinitialize')
-    add_command('')
-    
-    # Enhanced visual settings
-    add_command('# Enhanced visual settings')
-    add_command('set valence, 1')
-    add_command('set stick_rad, 0.12')
-    add_command('set line_width, 2')
-    add_command('set mesh_width, 0.5')
-    add_command('set label_size, 12')
-    add_command('set sphere_scale, 0.2')
-    add_command('set dash_round_ends, 1')
-    add_command('set dash_gap, 0.2')
-    add_command('set dash_length, 0.15')
-    add_command('')
-    
-    # Enhanced color definitions
-    add_command('# Enhanced color palette')
-    add_command("set_color lightblue, (173, 216, 230)")
-    add_command("set_color lightcoral, (240, 128, 128)")
-    add_command("set_color paleblue, (175, 238, 238)")
-    add_command("set_color violet, (238, 130, 238)")
-    add_command("set_color gold, (255, 215, 0)")
-    add_command("set_color forest, (34, 139, 34)")
-    add_command("set_color crimson, (220, 20, 60)")
-    add_command('')
-    
-    # Premium quality settings
-    add_command('# Premium quality settings')
-    add_command('set line_smooth, 1')
-    add_command('set antialias, 3')
-    add_command('set cartoon_fancy_helices, 1')
-    add_command('set cartoon_smooth_loops, 1')
-    add_command('set depth_cue, 1')
-    add_command('set specular, 1')
-    add_command('set shininess, 50')
-    add_command('set surface_quality, 2')
-    add_command('set stick_quality, 20')
-    add_command('set sphere_quality, 3')
-    add_command('set cartoon_sampling, 20')
-    add_command('set ribbon_sampling, 15')
-    add_command('set transparency_mode, 2')
-    add_command('set stick_ball, 1')
-    add_command('set stick_ball_ratio, 2.0')
-    add_command('set ray_shadows, 1')
-    add_command('rebuild')
-    add_command('')
-    
-    # Load structure
-    add_command(f'load {structure_file}')
-    add_command('select binding_site, None')
-    add_command('select target_residue, None')
-    add_command('set defer_update, 1')
-    add_command('')
-    
-    # Parse and process contacts
+    # Parse contacts before opening the script, so a malformed JSON
+    # doesn't leave a header-only script behind
     contacts = parse_json_contacts(json_file, filter_selection)
-    interaction_styling = []  # Initialize styling list
     
-    if not contacts:
-        print("Warning: No contacts found for the specified selection!")
-        add_command('# No contacts found for the specified selection')
-        add_command('print "No contacts found for the specified selection"')
-    else:
-        print(f"Found {len(contacts)} contacts for visualization")
-        
-        # Highlight target residue
-        if chain and resid:
-            add_command(f'# Highlight target residue {chain}:{resid}')
-            add_command(f'select target_residue, chain {chain} and resi {resid}')
-            add_command('show sticks, target_residue')
-            add_command('color yellow, target_residue')
-            add_command('set stick_radius, 0.2, target_residue')
-            add_command('')
+    # Stream commands straight to the script file as they are generated
+    with open(output_script, 'w') as f:
+        w = f.write
         
-        used_interaction_types = set()
+        # Enhanced PyMOL setup: static settings, palette and structure loading
+        w(PYMOL_SCRIPT_HEADER.format(selection_str=selection_str, structure_file=structure_file))
         
-        # Process contacts with enhanced grouping
-        interaction_counts = {}
+        # Process contacts
+        interaction_styling = []  # Initialize styling list
         
-        for i, contact in enumerate(contacts):
-            interaction_type = contact['interaction_type']
-            dist_flag = contact['dist_flag']
+        if not contacts:
+            print("Warning: No contacts found for the specified selection!")
+            w('# No contacts found for the specified selection\n')
+            w('print "No contacts found for the specified selection"\n')
+        else:
+            print(f"Found {len(contacts)} contacts for visualization")
             
-            # Count interactions by type
-            if interaction_type not in interaction_counts:
-                interaction_counts[interaction_type] = 0
-            interaction_counts[interaction_type] += 1
+            # Highlight target residue
+            if chain and resid:
+                w(f'# Highlight target residue {chain}:{resid}\n')
+                w(f'select target_residue, chain {chain} and resi {resid}\n')
+                w('show sticks, target_residue\n')
+                w('color yellow, target_residue\n')
+                w('set stick_radius, 0.2, target_residue\n')
+                w('\n')
             
-            # Handle special distance flags
-            if interaction_type in ['clash', 'covalent', 'vdwclash', 'vdw', 'proximal']:
-                dist_flag = interaction_type
+            used_interaction_types = set()
             
-            label = f'{interaction_type}-{dist_flag}'
+            # Count interactions by type
+            interaction_counts = Counter(contact.interaction_type for contact in contacts)
             
-            add_command(f"distance {label}, ({contact['bgn_sel']}), ({contact['end_sel']})")
-            add_command(f"show sticks, byres ({contact['bgn_sel']})")
-            add_command(f"show sticks, byres ({contact['end_sel']})")
-            add_command(f"select binding_site, binding_site + byres ({contact['bgn_sel']})")
-            add_command(f"select binding_site, binding_site + byres ({contact['end_sel']})")
+            # Residues in contact, per chain, in first-seen order
+            binding_residues = {}
             
-            used_interaction_types.add((interaction_type, dist_flag))
-        
-        # Store styling info for later application (after util.cbaw)
-        interaction_styling = []
-        for interaction_type, flag in used_interaction_types:
-            label = f'{interaction_type}-{flag}'
+            # Atom pairs already drawn per label; arpeggio often reports one
+            # atom pair under several interaction types
+            drawn_distances = set()
             
-            if interaction_type in pymol_config['dashcolor'] and flag in pymol_config['dashcolor'][interaction_type]:
-                color = pymol_config['dashcolor'][interaction_type][flag]
-                radius = pymol_config['dashradius'][interaction_type][flag]
-                gap = pymol_config['dashgap'][interaction_type][flag]
-                length = pymol_config['dashlength'][interaction_type][flag]
+            # Process contacts with enhanced grouping
+            for i, contact in enumerate(contacts):
+                interaction_type = contact.interaction_type
+                dist_flag = contact.dist_flag
                 
-                interaction_styling.append((label, color, radius, gap, length))
+                # Handle special distance flags
+                if interaction_type in ['clash', 'covalent', 'vdwclash', 'vdw', 'proximal']:
+                    dist_flag = interaction_type
+                
+                label = f'{interaction_type}-{dist_flag}'
+                
+                # Distances are symmetric, so key the pair independent of order
+                distance_key = (label, *sorted((contact.bgn_sel, contact.end_sel)))
+                if distance_key not in drawn_distances:
+                    drawn_distances.add(distance_key)
+                    w(DISTANCE_COMMAND.format(label=label, bgn=contact.bgn_sel, end=contact.end_sel))
+                
+                for res_chain, res_id in (contact.bgn_residue, contact.end_residue):
+                    binding_residues.setdefault(res_chain, {})[res_id] = None
+                
+                used_interaction_types.add((interaction_type, dist_flag))
+            
+            # One selection pass instead of two incremental updates per contact;
+            # binding_site is exactly the residues that need sticks
+            w(f'select binding_site, byres ({residue_selection(binding_residues)})\n')
+            w('show sticks, binding_site\n')
+            
+            # Store styling info for later application (after util.cbaw)
+            interaction_styling = []
+            for interaction_type, flag in used_interaction_types:
+                style = INTERACTION_STYLING.get((interaction_type, flag))
+                if style:
+                    interaction_styling.append((f'{interaction_type}-{flag}', *style))
+            
+            # Print interaction summary
+            w('\n')
+            w('# Interaction summary\n')
+            for interaction_type, count in sorted(interaction_counts.items()):
+                w(f'print "Found {count} {interaction_type} interactions"\n')
         
-        # Print interaction summary
-        add_command('')
-        add_command('# Interaction summary')
-        for interaction_type, count in sorted(interaction_counts.items()):
-            add_command(f'print "Found {count} {interaction_type} interactions"')
-    
-    # Enhanced final visualization
-    add_command('')
-    add_command('# Enhanced final visualization - IMPORTANT: util.cbaw resets colors!')
-    add_command('hide labels')
-    add_command('util.cbaw')  # This MUST come before interaction styling
-    add_command('bg_color white')
-    add_command('show cartoon')
-    add_command('set cartoon_side_chain_helper, 1')
-    add_command('set cartoon_transparency, 0.3')
-    add_command('# Keep main chain visible, only hide unnecessary lines')
-    #add_command('hide lines, het')  # Only hide lines for heteroatoms
-    add_command('hide everything, het')
-    add_command('show sticks, het')
-    add_command('show spheres, het')
-    add_command('color atomic, het')
-    
-    # Apply interaction styling AFTER util.cbaw to prevent color reset
-    if contacts and interaction_styling:
-        add_command('')
-        add_command('# Apply interaction-specific styling AFTER util.cbaw')
-        for label, color, radius, gap, length in interaction_styling:
-            add_command(f'color {color}, {label}')
-            add_command(f'set dash_radius, {radius}, {label}')
-            add_command(f'set dash_gap, {gap}, {label}')
-            add_command(f'set dash_length, {length}, {label}')
-    
-    # Create interaction legend
-    add_command('')
-    add_command('# Create interaction legend')
-    add_command('select legend_area, None')
-    
-    # Enhanced binding site visualization
-    add_command('')
-    add_command('# Enhanced binding site visualization')
-    add_command('# Surface display disabled per user preference')
-    add_command('')
-    add_command('# Label interacting residues with amino acid code and position')
-    add_command('label binding_site and name CA, oneletter + resi')
-    add_command('set label_color, black')
-    add_command('set label_size, 14')
-    add_command('set label_outline_color, black')
-    add_command('set label_position, (0, 0, 2)')  # Position labels above atoms
-    
-    # Disable less important interactions for clarity
-    add_command('disable undefined-proximal')
-    add_command('disable proximal-proximal')
-    
-    # Final settings
-    add_command('set defer_update, 0')
-    add_command('zoom binding_site')
-    add_command('')
-    
-    # Save session with descriptive name
-    base_name = os.path.splitext(os.path.basename(structure_file))[0]
-    selection_clean = selection_str.replace('/', '_').replace(':', '_')
-    pse_file = f"{base_name}_{selection_clean}.pse"
-    add_command(f'save {pse_file}')
-    add_command('')
-    add_command(f'print "Visualization complete! Session saved as {pse_file}"')
-    add_command(f'print "Target selection: {selection_str}"')
-    add_command(f'print "Total contacts: {len(contacts) if contacts else 0}"')
-    
-    # Write script
-    with open(output_script, 'w') as f:
-        f.write('\n'.join(script_lines))
+        # Enhanced final visualization
+        w('\n')
+        w('# Enhanced final visualization - IMPORTANT: util.cbaw resets colors!\n')
+        w('hide labels\n')
+        w('util.cbaw\n')  # This MUST come before interaction styling
+        w('bg_color white\n')
+        w('show cartoon\n')
+        w('set cartoon_side_chain_helper, 1\n')
+        w('set cartoon_transparency, 0.3\n')
+        w('# Keep main chain visible, only hide unnecessary lines\n')
+        #w('hide lines, het\n')  # Only hide lines for heteroatoms
+        w('hide everything, het\n')
+        w('show sticks, het\n')
+        w('show spheres, het\n')
+        w('color atomic, het\n')
+        
+        # Apply interaction styling AFTER util.cbaw to prevent color reset
+        if contacts and interaction_styling:
+            w('\n')
+            w('# Apply interaction-specific styling AFTER util.cbaw\n')
+            for label, color, radius, gap, length in interaction_styling:
+                w(f'color {color}, {label}\n')
+                w(f'set dash_radius, {radius}, {label}\n')
+                w(f'set dash_gap, {gap}, {label}\n')
+                w(f'set dash_length, {length}, {label}\n')
+        
+        # Create interaction legend
+        w('\n')
+        w('# Create interaction legend\n')
+        w('select legend_area, None\n')
+        
+        # Enhanced binding site visualization
+        w('\n')
+        w('# Enhanced binding site visualization\n')
+        w('# Surface display disabled per user preference\n')
+        w('\n')
+        w('# Label interacting residues with amino acid code and position\n')
+        w('label binding_site and name CA, oneletter + resi\n')
+        w('set label_color, black\n')
+        w('set label_size, 14\n')
+        w('set label_outline_color, black\n')
+        w('set label_position, (0, 0, 2)\n')  # Position labels above atoms
+        
+        # Disable less important interactions for clarity
+        w('disable undefined-proximal\n')
+        w('disable proximal-proximal\n')
+        
+        # Final settings
+        w('set defer_update, 0\n')
+        w('zoom binding_site\n')
+        w('\n')
+        
+        # Save session with descriptive name
+        base_name = os.path.splitext(os.path.basename(structure_file))[0]
+        selection_clean = selection_str.replace('/', '_').replace(':', '_')
+        pse_file = f"{base_name}_{selection_clean}.pse"
+        w(f'save {pse_file}\n')
+        w('\n')
+        w(f'print "Visualization complete! Session saved as {pse_file}"\n')
+        w(f'print "Target selection: {selection_str}"\n')
+        w(f'print "Total contacts: {len(contacts) if contacts else 0}"\n')
     
     return pse_file
 
+def decode_json_contacts(raw):
+    """Decode atom-atom contacts from arpeggio JSON into (bgn, end, contact, distance) records
+    
+    bgn and end are (chain, resid, atom name) tuples, with resid always an
+    int so selection filtering compares integers. Only the fields needed
+    for visualization are extracted, with the same defaults as before.
+    """
+    if msgspec is not None:
+        try:
+            records = []
+            for contact in contacts_decoder.decode(raw):
+                if contact.type != 'atom-atom':
+                    continue
+                
+                atom_bgn = atom_decoder.decode(contact.bgn)
+                atom_end = atom_decoder.decode(contact.end)
+                records.append((
+                    (atom_bgn.auth_asym_id, atom_bgn.auth_seq_id, atom_bgn.auth_atom_id),
+                    (atom_end.auth_asym_id, atom_end.auth_seq_id, atom_end.auth_atom_id),
+                    contact.contact,
+                    contact.distance
+                ))
+            return records
+        except msgspec.ValidationError as e:
+            print(f"Warning: unexpected arpeggio JSON layout ({e}), using generic parser")
+    
+    # orjson parses the raw bytes in C; fall back to the stdlib parser
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    
+    records = []
+    for contact in data:
+        if contact.get('type') != 'atom-atom':
+            continue
+        
+        atom_bgn = contact.get('bgn', {})
+        atom_end = contact.get('end', {})
+        records.append((
+            (atom_bgn.get('auth_asym_id', 'A'), int(atom_bgn.get('auth_seq_id', 1)), atom_bgn.get('auth_atom_id', 'CA')),
+            (atom_end.get('auth_asym_id', 'A'), int(atom_end.get('auth_seq_id', 1)), atom_end.get('auth_atom_id', 'CA')),
+            contact.get('contact', []),
+            contact.get('distance', 0.0)
+        ))
+    return records
+
 def parse_json_contacts(json_file, selection=None):
     """Parse arpeggio JSON output and extract contact information"""
-    if not os.path.exists(json_file):
+    # One stat for the cache key; a missing file (or one removed before it
+    # is opened) surfaces as FileNotFoundError instead of a separate check
+    try:
+        st = os.stat(json_file)
+        contact_index = read_json_contacts(json_file, st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
         print(f"Warning: JSON file {json_file} not found")
         return []
     
-    with open(json_file, 'r') as f:
-        data = json.load(f)
-    
-    # Parse selection if provided
-    filter_chain = None
-    filter_resid = None
-    if selection:
-        if ':' in selection:
-            filter_chain, filter_resid = selection.split(':')
-            filter_resid = int(filter_resid)
-        else:
-            filter_resid = int(selection)
+    return filter_contacts(contact_index, selection)
 
+@lru_cache(maxsize=8)
+def read_json_contacts(json_file, mtime_ns, size):
+    """Read every atom-atom contact from an arpeggio JSON file
+    
+    Returns (contacts, by_residue, by_resid): all contacts in file order,
+    plus indexes from (chain, resid) and from resid alone to the contacts
+    with either end in that residue. Cached per (path, mtime_ns, size) so
+    several selections on the same structure parse the file only once, while
+    a rewrite by a later arpeggio run is still picked up; the returned lists
+    are shared between callers and must not be modified.
+    """
+    with open(json_file, 'rb') as f:
+        raw = f.read()
+    
     contacts = []
+    by_residue = {}
+    by_resid = {}
     
-    for contact in data:
-        if contact.get('type') != 'atom-atom':
-            continue
-            
-        atom_bgn = contact.get('bgn', {})
-        atom_end = contact.get('end', {})
-        
-        # Apply selection filter
-        if selection:
-            bgn_chain = atom_bgn.get('auth_asym_id', 'A')
-            bgn_resid = atom_bgn.get('auth_seq_id', 1)
-            end_chain = atom_end.get('auth_asym_id', 'A')
-            end_resid = atom_end.get('auth_seq_id', 1)
-            
-            bgn_matches = True
-            end_matches = True
-            
-            if filter_chain:
-                bgn_matches = (bgn_chain == filter_chain and bgn_resid == filter_resid)
-                end_matches = (end_chain == filter_chain and end_resid == filter_resid)
-            else:
-                bgn_matches = (bgn_resid == filter_resid)
-                end_matches = (end_resid == filter_resid)
-            
-            if not (bgn_matches or end_matches):
-                continue
+    for atom_bgn, atom_end, interaction_types, distance in decode_json_contacts(raw):
+        bgn_chain, bgn_resid, bgn_atom = atom_bgn
+        end_chain, end_resid, end_atom = atom_end
         
-        # Build atom selections
-        bgn_sel = f"chain {atom_bgn.get('auth_asym_id', 'A')} and resi {atom_bgn.get('auth_seq_id', 1)} and name {atom_bgn.get('auth_atom_id', 'CA')}"
-        end_sel = f"chain {atom_end.get('auth_asym_id', 'A')} and resi {atom_end.get('auth_seq_id', 1)} and name {atom_end.get('auth_atom_id', 'CA')}"
+        # Build atom selections, shared by every interaction of this contact
+        bgn_sel = f"chain {bgn_chain} and resi {bgn_resid} and name {bgn_atom}"
+        end_sel = f"chain {end_chain} and resi {end_resid} and name {end_atom}"
+        bgn_residue = (bgn_chain, bgn_resid)
+        end_residue = (end_chain, end_resid)
         
-        interaction_types = contact.get('contact', [])
-        distance = contact.get('distance', 0.0)
+        # Determine distance flag: the first distance-type contact wins
+        dist_flag = next(
+            (DIST_FLAG_MAPPING[contact_type] for contact_type in interaction_types
+             if contact_type in DIST_FLAG_MAPPING),
+            'proximal'
+        )
         
-        # Determine distance flag
-        dist_flag = 'proximal'
-        for contact_type in interaction_types:
-            if contact_type in ['clash']:
-                dist_flag = 'clash'
-                break
-            elif contact_type in ['covalent']:
-                dist_flag = 'covalent'
-                break
-            elif contact_type in ['vdw_clash']:
-                dist_flag = 'vdwclash'
-                break
-            elif contact_type in ['vdw']:
-                dist_flag = 'vdw'
-                break
-            elif contact_type in ['proximal']:
-                dist_flag = 'proximal'
-                break
+        drawn = [
+            Contact(
+                bgn_sel, end_sel, bgn_residue, end_residue,
+                CONTACT_TYPE_MAPPING.get(contact_type, 'undefined'),
+                dist_flag, contact_type, distance
+            )
+            for contact_type in interaction_types
+        ]
+        contacts.extend(drawn)
         
-        # Map contact types
-        contact_type_mapping = {
-            'clash': 'clash', 'covalent': 'covalent', 'vdw_clash': 'vdwclash',
-            'vdw': 'vdw', 'proximal': 'proximal', 'hbond': 'hbond',
-            'weak_hbond': 'weakhbond', 'xbond': 'xbond', 'ionic': 'ionic',
-            'metal': 'metalcomplex', 'aromatic': 'aromatic', 'hydrophobic': 'hydrophobic',
-            'carbonyl': 'carbonyl', 'polar': 'polar', 'weak_polar': 'weakpolar'
-        }
-        
-        for contact_type in interaction_types:
-            interaction_type = contact_type_mapping.get(contact_type, 'undefined')
-            contacts.append({
-                'bgn_sel': bgn_sel,
-                'end_sel': end_sel,
-                'interaction_type': interaction_type,
-                'dist_flag': dist_flag,
-                'original_type': contact_type,
-                'distance': distance
-            })
-    
-    return contacts
-
-def run_pymol_automation(structure_file, script_file, pse_file):
-    """Automatically run PyMOL with the generated script and save PSE file"""
+        # Index under both ends, once if both ends share the residue
+        by_residue.setdefault(bgn_residue, []).extend(drawn)
+        if end_residue != bgn_residue:
+            by_residue.setdefault(end_residue, []).extend(drawn)
+        by_resid.setdefault(bgn_resid, []).extend(drawn)
+        if end_resid != bgn_resid:
+            by_resid.setdefault(end_resid, []).extend(drawn)
+    
+    return contacts, by_residue, by_resid
+
+def filter_contacts(contact_index, selection=None):
+    """Keep contacts with either end in the selection (A:10 or 10)"""
+    contacts, by_residue, by_resid = contact_index
+    if not selection:
+        return contacts
+    
+    filter_chain = None
+    if ':' in selection:
+        filter_chain, selection = selection.split(':')
+    filter_resid = int(selection)
+    
+    if filter_chain:
+        return by_residue.get((filter_chain, filter_resid), [])
+    return by_resid.get(filter_resid, [])
+
+def run_pymol_session(session, script_file, pse_file):
+    """Run the generated script in an in-process PyMOL session and save PSE file"""
+    print(f"Running {script_file} in the embedded PyMOL session...")
+    
+    try:
+        # The script starts with reinitialize, so one session serves every selection
+        session.cmd.do(f"@{script_file}")
+        session.cmd.save(pse_file)
+    except Exception as e:
+        print(f"✗ Error during PyMOL automation: {e}")
+        return False
+    
+    print(f"✓ PyMOL automation completed successfully!")
+    print(f"  - PSE file saved: {pse_file}")
+    return True
+
+async def run_pymol_automation(structure_file, script_file, pse_file, session=None):
+    """Automatically run PyMOL with the generated script and save PSE file
+    
+    Uses the given pymol2 session when available, otherwise starts a
+    `pymol -c` subprocess.
+    """
+    if session is not None:
+        return run_pymol_session(session, script_file, pse_file)
+    
     print(f"Starting PyMOL automation for {script_file}...")
     
-    # Create a temporary PyMOL command script
-    temp_script = f"temp_pymol_commands_{os.getpid()}.pml"
+    # Create a temporary PyMOL command script, unique per concurrent session
+    pse_stem = os.path.splitext(os.path.basename(pse_file))[0]
+    temp_script = f"temp_pymol_commands_{os.getpid()}_{pse_stem}.pml"
     
     try:
         with open(temp_script, 'w') as f:
@@ -472,19 +639,19 @@ def run_pymol_automation(structure_file, script_file, pse_file):
         cmd = ["pymol", "-c", temp_script]  # -c for command line mode
         
         print(f"Executing: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)  # 5 minute timeout
+        returncode, stdout, stderr = await run_subprocess(cmd, timeout=300)  # 5 minute timeout
         
-        if result.returncode == 0:
+        if returncode == 0:
             print(f"✓ PyMOL automation completed successfully!")
             print(f"  - PSE file saved: {pse_file}")
             return True
         else:
-            print(f"✗ PyMOL automation failed with return code {result.returncode}")
-            if result.stderr:
-                print(f"Error output: {result.stderr}")
+            print(f"✗ PyMOL automation failed with return code {returncode}")
+            if stderr:
+                print(f"Error output: {stderr}")
             return False
             
-    except subprocess.TimeoutExpired:
+    except asyncio.TimeoutError:
         print("✗ PyMOL automation timed out (5 minutes)")
         return False
     except FileNotFoundError:
@@ -502,6 +669,96 @@ def run_pymol_automation(structure_file, script_file, pse_file):
             except:
                 pass
 
+async def process_selection(selection, args, pymol_slots, pymol_session=None):
+    """Run PyMOL visualization for one selection from the arpeggio JSON"""
+    print(f"\n{'='*60}")
+    print(f"Processing selection: {selection}")
+    print(f"{'='*60}")
+    
+    # Determine JSON file name
+    base_name = os.path.splitext(os.path.basename(args.structure_file))[0]
+    json_file = os.path.join(args.output, f"{base_name}.json")
+    
+    # Generate PyMOL visualization
+    selection_clean = selection.replace('/', '_').replace(':', '_')
+    script_name = f"{base_name}_{selection_clean}.pml"
+    
+    print(f"Generating enhanced PyMOL visualization...")
+    pse_file = generate_enhanced_pymol_script(json_file, args.structure_file, selection, script_name)
+    
+    # Automatic PyMOL execution
+    pymol_success = False
+    if args.auto_pymol and not args.no_auto_pymol:
+        print(f"Running PyMOL automation...")
+        # Bounded so many selections don't start a PyMOL load each at once
+        async with pymol_slots:
+            pymol_success = await run_pymol_automation(args.structure_file, script_name, pse_file, pymol_session)
+        if pymol_success:
+            print(f"  - PSE file automatically generated: {pse_file}")
+    
+    print(f"\n✓ Analysis complete for selection {selection}")
+    print(f"  - PyMOL script: {script_name}")
+    if pymol_success:
+        print(f"  - PSE file: {pse_file} (automatically generated)")
+    else:
+        print(f"  - Expected PSE file: {pse_file}")
+        print(f"  - To visualize manually: pymol {script_name}")
+    return True
+
+async def process_selections_separately(args, pymol_slots, pymol_session=None):
+    """Analyze and visualize each selection on its own, skipping failures"""
+    results = []
+    for selection in args.selection:
+        # Every run writes the same JSON, so finish one selection before
+        # starting the next analysis
+        if await run_arpeggio_analysis(args.structure_file, [selection], args.output):
+            results.append(await process_selection(selection, args, pymol_slots, pymol_session))
+        else:
+            print(f"Failed to analyze selection {selection}")
+            results.append(False)
+    return results
+
+async def process_selections(args):
+    """Run arpeggio once, then process all selections concurrently
+    
+    Returns one success flag per selection, in the order given.
+    """
+    # At most one PyMOL run per core at a time
+    pymol_slots = asyncio.Semaphore(os.cpu_count() or 1)
+    
+    # Reuse one in-process PyMOL for all selections instead of a cold
+    # `pymol -c` start per selection
+    pymol_session = None
+    if args.auto_pymol and not args.no_auto_pymol and pymol2 is not None:
+        try:
+            session = pymol2.PyMOL()
+            session.start()
+            pymol_session = session
+        except Exception as e:
+            # e.g. headless or missing libraries; `pymol -c` still works
+            print(f"Warning: could not start embedded PyMOL, falling back to pymol -c: {e}")
+    
+    try:
+        # A single run over the union of the selections yields every contact
+        # needed; each selection is filtered from the shared JSON afterwards
+        if not args.skip_analysis and not args.pymol_only:
+            success = await run_arpeggio_analysis(args.structure_file, args.selection, args.output)
+            if not success:
+                if len(args.selection) == 1:
+                    print(f"Failed to analyze selection {args.selection[0]}")
+                    return [False]
+                # One bad selection fails the shared run; retry each on its
+                # own so only the bad ones are skipped
+                print("Shared arpeggio run failed, analyzing each selection separately...")
+                return await process_selections_separately(args, pymol_slots, pymol_session)
+        
+        return await asyncio.gather(
+            *(process_selection(selection, args, pymol_slots, pymol_session) for selection in args.selection)
+        )
+    finally:
+        if pymol_session is not None:
+            pymol_session.stop()
+
 def main():
     parser = argparse.ArgumentParser(description='''
     
@@ -546,48 +803,16 @@ def main():
         print(f"Error: Structure file {args.structure_file} not found")
         sys.exit(1)
     
-    # Process each selection
-    for selection in args.selection:
-        print(f"\n{'='*60}")
-        print(f"Processing selection: {selection}")
-        print(f"{'='*60}")
-        
-        # Determine JSON file name
-        base_name = os.path.splitext(os.path.basename(args.structure_file))[0]
-        json_file = os.path.join(args.output, f"{base_name}.json")
-        
-        # Run arpeggio analysis if needed
-        if not args.skip_analysis and not args.pymol_only:
-            success = run_arpeggio_analysis(args.structure_file, selection, args.output)
-            if not success:
-                print(f"Failed to analyze selection {selection}")
-                continue
-        
-        # Generate PyMOL visualization
-        selection_clean = selection.replace('/', '_').replace(':', '_')
-        script_name = f"{base_name}_{selection_clean}.pml"
-        
-        print(f"Generating enhanced PyMOL visualization...")
-        pse_file = generate_enhanced_pymol_script(json_file, args.structure_file, selection, script_name)
-        
-        # Automatic PyMOL execution
-        pymol_success = False
-        if args.auto_pymol and not args.no_auto_pymol:
-            print(f"Running PyMOL automation...")
-            pymol_success = run_pymol_automation(args.structure_file, script_name, pse_file)
-            if pymol_success:
-                print(f"  - PSE file automatically generated: {pse_file}")
-        
-        print(f"\n✓ Analysis complete for selection {selection}")
-        print(f"  - PyMOL script: {script_name}")
-        if pymol_success:
-            print(f"  - PSE file: {pse_file} (automatically generated)")
-        else:
-            print(f"  - Expected PSE file: {pse_file}")
-            print(f"  - To visualize manually: pymol {script_name}")
+    # Selections are independent and dominated by the pdbe-arpeggio and
+    # PyMOL subprocesses, so run them side by side from one event loop
+    results = asyncio.run(process_selections(args))
+    failed = [selection for selection, ok in zip(args.selection, results) if not ok]
     
     print(f"\n{'='*60}")
-    print("All selections processed successfully!")
+    if failed:
+        print(f"Failed to process {len(failed)}/{len(args.selection)} selection(s): {' '.join(failed)}")
+    else:
+        print("All selections processed successfully!")
     if args.auto_pymol and not args.no_auto_pymol:
         print("PyMOL sessions have been automatically generated.")
         print("You can open the PSE files directly in PyMOL.")
@@ -595,6 +820,9 @@ def main():
         print("Use 'pymol <script_name>' to view the results.")
         print("Or use --auto-pymol flag to automatically generate PSE files.")
     print(f"{'='*60}")
+    
+    if failed:
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
@@ -8,121 +8,183 @@ python pdb2cif.py .
 
 import sys
 import os
-from Bio import PDB
-from Bio.PDB import MMCIFIO
-import tempfile
+from io import StringIO
+from contextlib import redirect_stdout
 import subprocess
+import shutil
+from types import MappingProxyType
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def get_standard_residue_info():
-    """Return standard amino acid and nucleotide information"""
-    standard_aa = {
-        'ALA': {'type': 'L-PEPTIDE LINKING', 'formula': 'C3 H7 N O2'},
-        'ARG': {'type': 'L-PEPTIDE LINKING', 'formula': 'C6 H14 N4 O2'},
-        'ASN': {'type': 'L-PEPTIDE LINKING', 'formula': 'C4 H8 N2 O3'},
-        'ASP': {'type': 'L-PEPTIDE LINKING', 'formula': 'C4 H7 N O4'},
-        'CYS': {'type': 'L-PEPTIDE LINKING', 'formula': 'C3 H7 N O2 S'},
-        'GLN': {'type': 'L-PEPTIDE LINKING', 'formula': 'C5 H10 N2 O3'},
-        'GLU': {'type': 'L-PEPTIDE LINKING', 'formula': 'C5 H9 N O4'},
-        'GLY': {'type': 'L-PEPTIDE LINKING', 'formula': 'C2 H5 N O2'},
-        'HIS': {'type': 'L-PEPTIDE LINKING', 'formula': 'C6 H9 N3 O2'},
-        'ILE': {'type': 'L-PEPTIDE LINKING', 'formula': 'C6 H13 N O2'},
-        'LEU': {'type': 'L-PEPTIDE LINKING', 'formula': 'C6 H13 N O2'},
-        'LYS': {'type': 'L-PEPTIDE LINKING', 'formula': 'C6 H14 N2 O2'},
-        'MET': {'type': 'L-PEPTIDE LINKING', 'formula': 'C5 H11 N O2 S'},
-        'PHE': {'type': 'L-PEPTIDE LINKING', 'formula': 'C9 H11 N O2'},
-        'PRO': {'type': 'L-PEPTIDE LINKING', 'formula': 'C5 H9 N O2'},
-        'SER': {'type': 'L-PEPTIDE LINKING', 'formula': 'C3 H7 N O3'},
-        'THR': {'type': 'L-PEPTIDE LINKING', 'formula': 'C4 H9 N O3'},
-        'TRP': {'type': 'L-PEPTIDE LINKING', 'formula': 'C11 H12 N2 O2'},
-        'TYR': {'type': 'L-PEPTIDE LINKING', 'formula': 'C9 H11 N O3'},
-        'VAL': {'type': 'L-PEPTIDE LINKING', 'formula': 'C5 H11 N O2'},
-        # Common water and ions
-        'HOH': {'type': 'NON-POLYMER', 'formula': 'H2 O'},
-        'WAT': {'type': 'NON-POLYMER', 'formula': 'H2 O'},
-        'NA': {'type': 'NON-POLYMER', 'formula': 'Na'},
-        'CL': {'type': 'NON-POLYMER', 'formula': 'Cl'},
-        'MG': {'type': 'NON-POLYMER', 'formula': 'Mg'},
-        'CA': {'type': 'NON-POLYMER', 'formula': 'Ca'},
-        'ZN': {'type': 'NON-POLYMER', 'formula': 'Zn'},
-        'FE': {'type': 'NON-POLYMER', 'formula': 'Fe'},
-    }
-    return standard_aa
-
-def extract_residues_from_pdb(pdb_file):
-    """Extract unique residue names from PDB file"""
-    residues = set()
+try:
+    import gemmi
+except ImportError:
+    gemmi = None
+
+# Resolved once so batch runs don't fork a doomed subprocess per file
+GEMMI_CLI = shutil.which('gemmi')
+
+# Record names a PDB file can plausibly start with; anything else is skipped
+PDB_RECORD_PREFIXES = (
+    # Title section
+    b'HEADER', b'OBSLTE', b'TITLE', b'SPLIT', b'CAVEAT', b'COMPND', b'SOURCE',
+    b'KEYWDS', b'EXPDTA', b'NUMMDL', b'MDLTYP', b'AUTHOR', b'REVDAT', b'SPRSDE',
+    b'JRNL', b'REMARK',
+    # Primary structure, heterogen, secondary structure and connectivity
+    b'DBREF', b'SEQADV', b'SEQRES', b'MODRES', b'HET', b'FORMUL', b'HELIX',
+    b'SHEET', b'SSBOND', b'LINK', b'CISPEP', b'SITE',
+    # Crystallographic, coordinate and bookkeeping records
+    b'CRYST1', b'ORIGX', b'SCALE', b'MTRIX', b'MODEL', b'ATOM', b'ANISOU', b'TER',
+    b'ENDMDL', b'CONECT', b'MASTER', b'END',
+    # Written by tools such as reduce
+    b'USER',
+)
+PDB_SNIFF_BYTES = 512
+
+# Minimal info for residues missing from the standard table
+UNKNOWN_RESIDUE_INFO = {'type': 'NON-POLYMER', 'formula': '?'}
+
+CHEM_COMP_HEADER = (
+    "\n# Chemical component information\n"
+    "loop_\n"
+    "_chem_comp.id\n"
+    "_chem_comp.type\n"
+    "_chem_comp.formula\n"
+    "_chem_comp.name\n"
+)
+CHEM_COMP_ROW = "{residue} '{type}' '{formula}' {residue}\n"
+
+# Standard amino acid, water and ion information, shared read-only across calls
+STANDARD_RESIDUES = MappingProxyType({
+    'ALA': {'type': 'L-PEPTIDE LINKING', 'formula': 'C3 H7 N O2'},
+    'ARG': {'type': 'L-PEPTIDE LINKING', 'formula': 'C6 H14 N4 O2'},
+    'ASN': {'type': 'L-PEPTIDE LINKING', 'formula': 'C4 H8 N2 O3'},
+    'ASP': {'type': 'L-PEPTIDE LINKING', 'formula': 'C4 H7 N O4'},
+    'CYS': {'type': 'L-PEPTIDE LINKING', 'formula': 'C3 H7 N O2 S'},
+    'GLN': {'type': 'L-PEPTIDE LINKING', 'formula': 'C5 H10 N2 O3'},
+    'GLU': {'type': 'L-PEPTIDE LINKING', 'formula': 'C5 H9 N O4'},
+    'GLY': {'type': 'L-PEPTIDE LINKING', 'formula': 'C2 H5 N O2'},
+    'HIS': {'type': 'L-PEPTIDE LINKING', 'formula': 'C6 H9 N3 O2'},
+    'ILE': {'type': 'L-PEPTIDE LINKING', 'formula': 'C6 H13 N O2'},
+    'LEU': {'type': 'L-PEPTIDE LINKING', 'formula': 'C6 H13 N O2'},
+    'LYS': {'type': 'L-PEPTIDE LINKING', 'formula': 'C6 H14 N2 O2'},
+    'MET': {'type': 'L-PEPTIDE LINKING', 'formula': 'C5 H11 N O2 S'},
+    'PHE': {'type': 'L-PEPTIDE LINKING', 'formula': 'C9 H11 N O2'},
+    'PRO': {'type': 'L-PEPTIDE LINKING', 'formula': 'C5 H9 N O2'},
+    'SER': {'type': 'L-PEPTIDE LINKING', 'formula': 'C3 H7 N O3'},
+    'THR': {'type': 'L-PEPTIDE LINKING', 'formula': 'C4 H9 N O3'},
+    'TRP': {'type': 'L-PEPTIDE LINKING', 'formula': 'C11 H12 N2 O2'},
+    'TYR': {'type': 'L-PEPTIDE LINKING', 'formula': 'C9 H11 N O3'},
+    'VAL': {'type': 'L-PEPTIDE LINKING', 'formula': 'C5 H11 N O2'},
+    # Common water and ions
+    'HOH': {'type': 'NON-POLYMER', 'formula': 'H2 O'},
+    'WAT': {'type': 'NON-POLYMER', 'formula': 'H2 O'},
+    'NA': {'type': 'NON-POLYMER', 'formula': 'Na'},
+    'CL': {'type': 'NON-POLYMER', 'formula': 'Cl'},
+    'MG': {'type': 'NON-POLYMER', 'formula': 'Mg'},
+    'CA': {'type': 'NON-POLYMER', 'formula': 'Ca'},
+    'ZN': {'type': 'NON-POLYMER', 'formula': 'Zn'},
+    'FE': {'type': 'NON-POLYMER', 'formula': 'Fe'},
+})
+
+@lru_cache(maxsize=None)
+def biopython_io():
+    """Import BioPython on first use and return a shared parser and CIF writer"""
+    # Only the fallback path needs BioPython, so gemmi runs never pay for it
+    from Bio.PDB import PDBParser, MMCIFIO
+    return PDBParser(QUIET=True), MMCIFIO()
+
+def add_chem_comp_loop(block, residues):
+    """Set the _chem_comp loop of a gemmi CIF block for the given residues"""
+    # Replaces any existing loop, e.g. the id/type-only one gemmi writes
+    loop = block.init_loop('_chem_comp.', ['id', 'type', 'formula', 'name'])
+    for residue in sorted(residues):
+        info = STANDARD_RESIDUES.get(residue, UNKNOWN_RESIDUE_INFO)
+        loop.add_row([residue, gemmi.cif.quote(info['type']), gemmi.cif.quote(info['formula']), residue])
+
+def looks_like_pdb(pdb_file):
+    """Cheap check that a file starts with PDB records before parsing it"""
     try:
-        with open(pdb_file, 'r') as f:
-            for line in f:
-                if line.startswith(('ATOM', 'HETATM')):
-                    resname = line[17:20].strip()
-                    if resname:
-                        residues.add(resname)
-    except Exception as e:
-        print(f"Warning: Could not extract residues from PDB: {e}")
-    return residues
+        with open(pdb_file, 'rb') as f:
+            head = f.read(PDB_SNIFF_BYTES)
+    except OSError:
+        return False
+    return any(line.lstrip().startswith(PDB_RECORD_PREFIXES) for line in head.splitlines())
+
+def create_gemmi_cif(pdb_file, output_cif):
+    """Convert with the gemmi Python API and fill in the _chem_comp loop"""
+    st = gemmi.read_pdb(pdb_file)
+    st.setup_entities()
+    doc = st.make_mmcif_document()
+    block = doc.sole_block()
+    
+    residues_in_structure = {res.name for model in st for chain in model for res in chain}
+    add_chem_comp_loop(block, residues_in_structure)
+    doc.write_file(output_cif)
+    return residues_in_structure
 
 def create_enhanced_cif(pdb_file, output_cif=None):
     """Create CIF file with proper chemical component information"""
     if output_cif is None:
         output_cif = os.path.splitext(pdb_file)[0] + ".cif"
     
-    # First, try using BioPython for basic conversion
+    # Prefer the gemmi Python API, which avoids building a BioPython Structure
+    if gemmi is not None:
+        try:
+            residues_in_structure = create_gemmi_cif(pdb_file, output_cif)
+            print(f"✅ Enhanced CIF conversion (gemmi): {pdb_file} -> {output_cif}")
+            print(f"   Added chemical component info for {len(residues_in_structure)} residue types")
+            return True
+        except Exception as e:
+            print(f"Warning: gemmi conversion failed, falling back to BioPython: {e}")
+    
+    # Otherwise use BioPython for basic conversion
     try:
-        parser = PDB.PDBParser(QUIET=True)
+        parser, cif_writer = biopython_io()
         structure = parser.get_structure("structure", pdb_file)
         
-        # Create temporary CIF file
-        temp_cif = tempfile.NamedTemporaryFile(mode='w', suffix='.cif', delete=False)
-        temp_cif.close()
-        
-        io = MMCIFIO()
-        io.set_structure(structure)
-        io.save(temp_cif.name)
+        # Write the basic CIF to an in-memory buffer
+        cif_buffer = StringIO()
+        cif_writer.set_structure(structure)
+        cif_writer.save(cif_buffer)
         
-        # Read the generated CIF and enhance it
-        with open(temp_cif.name, 'r') as f:
-            cif_content = f.read()
+        # Extract residues from the already-parsed structure
+        residues_in_structure = {res.get_resname().strip() for res in structure.get_residues()}
         
-        # Extract residues from original PDB
-        residues_in_structure = extract_residues_from_pdb(pdb_file)
-        standard_residues = get_standard_residue_info()
+        # With gemmi available, edit the parsed document rather than the text
+        if gemmi is not None:
+            doc = gemmi.cif.read_string(cif_buffer.getvalue())
+            add_chem_comp_loop(doc.sole_block(), residues_in_structure)
+            doc.write_file(output_cif)
+            print(f"✅ Enhanced CIF conversion: {pdb_file} -> {output_cif}")
+            print(f"   Added chemical component info for {len(residues_in_structure)} residue types")
+            return True
         
         # Add chemical component information
-        chem_comp_section = "\n# Chemical component information\n"
-        chem_comp_section += "loop_\n"
-        chem_comp_section += "_chem_comp.id\n"
-        chem_comp_section += "_chem_comp.type\n"
-        chem_comp_section += "_chem_comp.formula\n"
-        chem_comp_section += "_chem_comp.name\n"
-        
-        for residue in sorted(residues_in_structure):
-            if residue in standard_residues:
-                info = standard_residues[residue]
-                chem_comp_section += f"{residue} '{info['type']}' '{info['formula']}' {residue}\n"
-            else:
-                # For unknown residues, provide minimal info
-                chem_comp_section += f"{residue} 'NON-POLYMER' '?' {residue}\n"
-        
-        chem_comp_section += "#\n"
+        rows = [
+            CHEM_COMP_ROW.format(residue=residue, **STANDARD_RESIDUES.get(residue, UNKNOWN_RESIDUE_INFO))
+            for residue in sorted(residues_in_structure)
+        ]
+        chem_comp_section = CHEM_COMP_HEADER + ''.join(rows) + "#\n"
         
         # Insert chemical component section after the data block header
-        lines = cif_content.split('\n')
-        enhanced_lines = []
-        data_block_found = False
-        
-        for line in lines:
-            enhanced_lines.append(line)
-            if line.startswith('data_') and not data_block_found:
-                enhanced_lines.append(chem_comp_section)
-                data_block_found = True
-        
-        # Write enhanced CIF
-        with open(output_cif, 'w') as f:
-            f.write('\n'.join(enhanced_lines))
-        
-        # Clean up temp file
-        os.unlink(temp_cif.name)
+        cif_content = cif_buffer.getvalue()
+        preamble = ''
+        head, _, tail = cif_content.partition('\n')
+        if not head.startswith('data_'):
+            # MMCIFIO writes the header first, so this is the rare path
+            header_at = cif_content.find('\ndata_') + 1
+            if header_at:
+                preamble = cif_content[:header_at]
+                head, _, tail = cif_content[header_at:].partition('\n')
+        with open(output_cif, 'w') as dst:
+            if head.startswith('data_'):
+                dst.write(preamble)
+                dst.write(head + '\n')
+                dst.write(chem_comp_section + '\n')
+                dst.write(tail)
+            else:
+                dst.write(cif_content)
         
         print(f"✅ Enhanced CIF conversion: {pdb_file} -> {output_cif}")
         print(f"   Added chemical component info for {len(residues_in_structure)} residue types")
@@ -134,8 +196,10 @@ def create_enhanced_cif(pdb_file, output_cif=None):
 
 def try_gemmi_conversion(pdb_file, output_cif):
     """Try using gemmi for PDB to CIF conversion (if available)"""
+    if GEMMI_CLI is None:
+        return False
     try:
-        cmd = ['gemmi', 'convert', pdb_file, output_cif]
+        cmd = [GEMMI_CLI, 'convert', pdb_file, output_cif]
         result = subprocess.run(cmd, capture_output=True, text=True, check=True)
         print(f"✅ Gemmi conversion successful: {pdb_file} -> {output_cif}")
         return True
@@ -149,17 +213,26 @@ def pdb_to_cif_enhanced(input_pdb, output_cif=None):
     
     print(f"Converting {input_pdb} to enhanced CIF format...")
     
-    # Method 1: Try gemmi (most reliable for arpeggio)
-    if try_gemmi_conversion(input_pdb, output_cif):
+    # Method 1: Try the gemmi CLI (most reliable for arpeggio); the gemmi
+    # Python module, when importable, is used by create_enhanced_cif instead
+    if gemmi is None and try_gemmi_conversion(input_pdb, output_cif):
         return output_cif
     
-    # Method 2: Enhanced BioPython conversion
+    # Method 2: Enhanced conversion (gemmi API or BioPython)
     if create_enhanced_cif(input_pdb, output_cif):
         return output_cif
     
     print(f"❌ All conversion methods failed for {input_pdb}")
     return None
 
+def convert_with_buffered_log(input_pdb):
+    """Batch worker: convert one file and return its messages as a single block"""
+    # Written by the parent in one go, so parallel workers never interleave
+    log = StringIO()
+    with redirect_stdout(log):
+        result = pdb_to_cif_enhanced(input_pdb)
+    return result, log.getvalue()
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage:")
@@ -174,17 +247,30 @@ if __name__ == "__main__":
 
     if os.path.isdir(target):
         # Batch mode
-        pdb_files = [f for f in os.listdir(target) if f.lower().endswith(".pdb")]
+        with os.scandir(target) as entries:
+            pdb_files = [entry.path for entry in entries
+                         if entry.name.lower().endswith(".pdb") and entry.is_file()]
         if not pdb_files:
             print("❌ No .pdb files found in current directory")
             sys.exit(1)
         
-        success_count = 0
+        # Skip empty or junk files before paying for a parse
+        valid_files = []
         for pdb_file in pdb_files:
-            full_path = os.path.join(target, pdb_file)
-            result = pdb_to_cif_enhanced(full_path)
-            if result:
-                success_count += 1
+            if looks_like_pdb(pdb_file):
+                valid_files.append(pdb_file)
+            else:
+                print(f"⚠️  Skipping {pdb_file}: does not look like a PDB file")
+        
+        # Conversions are independent and CPU-bound, so run them in parallel
+        success_count = 0
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = [executor.submit(convert_with_buffered_log, pdb_file) for pdb_file in valid_files]
+            for future in as_completed(futures):
+                result, log = future.result()
+                sys.stdout.write(log)
+                if result:
+                    success_count += 1
         
         print(f"\n✅ Successfully converted {success_count}/{len(pdb_files)} files")
     else: